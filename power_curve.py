@@ -0,0 +1,21 @@
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Wind turbine power curve, kept free of Streamlit so plain scripts can import it
+
+def calculate_energy(wind_speeds, start_speed, rated_speed, max_speed, rated_power):
+    """Calculate the energy generation based on wind speed according to the given power curve."""
+    speeds = np.asarray(wind_speeds, dtype=np.float64)
+    power_generation = np.zeros_like(speeds)
+
+    # Only samples inside the ramp or falling regions are evaluated, everything below the cut-in speed,
+    # at or above the max speed, or missing stays at zero
+    ramp = (speeds >= start_speed) & (speeds < rated_speed)
+    falling = (speeds >= start_speed) & (speeds >= rated_speed) & (speeds < max_speed)
+
+    frac = (speeds[ramp] - start_speed) / (rated_speed - start_speed)
+    power_generation[ramp] = rated_power * frac * frac * frac
+    power_generation[falling] = rated_power * (1.0 - (speeds[falling] - rated_speed) / (max_speed - rated_speed))
+
+    total_energy = float(power_generation.sum())  # total energy in kWh, each interval represents 1 hour
+    return total_energy, power_generation
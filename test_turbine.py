@@ -1,31 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-def calculate_energy(wind_speeds, start_speed, rated_speed, max_speed, rated_power):
-    """Calculate the energy generation based on wind speed according to the given power curve."""
-    energy = 0
-    power_generation = []
-
-    for speed in wind_speeds:
-        if speed < start_speed:
-            # Region 1: No power generated below the cut-in speed
-            power_output = 0
-        elif start_speed <= speed < rated_speed:
-            # Region 2: Power increases non-linearly (cubic) as wind speed increases up to the rated speed
-            power_output = rated_power * ((speed - start_speed) / (rated_speed - start_speed)) ** 3
-        elif rated_speed <= speed < max_speed:
-            # Region 3: Power decreases linearly after reaching rated speed
-            power_output = rated_power - ((speed - rated_speed) / (max_speed - rated_speed)) * rated_power
-        else:
-            # Region 4: Cut-out region, no power generated beyond max speed
-            power_output = 0
-        
-        power_generation.append(power_output)
-        energy += power_output  # accumulate energy over each time interval (assuming each interval is 1 hour)
-
-    total_energy = energy  # total energy in kWh, since each interval represents 1 hour
-    return total_energy, power_generation
-
+from power_curve import calculate_energy
 
 # Parameters
 start_speed = 3        # m/s
@@ -0,0 +1,238 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from geopy.geocoders import Nominatim
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import BytesIO
+from pathlib import Path
+import hashlib
+import pickle
+import tempfile
+
+# -----------------------------------------------------------------------------
+# Shared data access functions used by the Streamlit pages
+
+# Open-Meteo fills in the archive with a delay of a few days, ranges ending before this lag no longer change
+_ARCHIVE_LAG = timedelta(days=7)
+# Settled ranges are kept on disk across restarts, the oldest files are dropped beyond the limit
+_ARCHIVE_CACHE_DIR = Path('.wind_cache')
+_ARCHIVE_CACHE_MAX_FILES = 256
+
+@st.cache_resource
+def _http_session():
+    """Create a keep-alive HTTP session shared by all Open-Meteo requests."""
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = 'gzip, deflate'
+    retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET'])
+    )
+    session.mount("https://", HTTPAdapter(max_retries=retries, pool_connections=4, pool_maxsize=8))
+    return session
+
+def _hourly_to_dataframe(hourly_data):
+    """Build the wind DataFrame from the 'hourly' block of an Open-Meteo response."""
+    dates = pd.date_range(
+        start=pd.to_datetime(hourly_data['time'][0], format='%Y-%m-%dT%H:%M', utc=True),
+        periods=len(hourly_data['time']),
+        freq='h'
+    )
+    # Build the columns straight from the decoded lists, missing hours become NaN
+    return pd.DataFrame({
+        'date': dates,
+        'wind_speed_10m': np.asarray(hourly_data['wind_speed_10m'], dtype=np.float64),
+        'wind_gusts_10m': np.asarray(hourly_data['wind_gusts_10m'], dtype=np.float64)
+    })
+
+def _year_ranges(start_date, end_date):
+    """Split an inclusive 'YYYY-MM-DD' date range into one range per calendar year."""
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    ranges = []
+    while start <= end:
+        year_end = min(date(start.year, 12, 31), end)
+        ranges.append((start.isoformat(), year_end.isoformat()))
+        start = year_end + timedelta(days=1)
+    # An inverted range is passed through unchanged so the API reports it
+    return ranges or [(start_date, end_date)]
+
+def _request_archive(session, latitudes, longitudes, start_date, end_date):
+    """Request one date range from the Open-Meteo archive, returning one decoded object per location."""
+    url = "https://archive-api.open-meteo.com/v1/archive"
+    params = {
+        "latitude": ",".join(str(latitude) for latitude in latitudes),
+        "longitude": ",".join(str(longitude) for longitude in longitudes),
+        "start_date": start_date,
+        "end_date": end_date,
+        "hourly": ["wind_speed_10m", "wind_gusts_10m"],
+        "wind_speed_unit": "ms"
+    }
+    response = session.get(url, params=params, timeout=10)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    # A single location is returned as one object, several as a list in request order
+    return [data] if isinstance(data, dict) else data
+
+def _download_wind_data(latitudes, longitudes, start_date, end_date):
+    """Download wind data from Open-Meteo, returning one DataFrame per location."""
+    session = _http_session()
+    # Yearly requests are latency-bound, so issue them concurrently and stitch them back in order
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        chunks = list(executor.map(
+            lambda dates: _request_archive(session, latitudes, longitudes, *dates),
+            _year_ranges(start_date, end_date)
+        ))
+    frames = []
+    for location_chunks in zip(*chunks):
+        hourly_chunks = [location_data.get('hourly') for location_data in location_chunks]
+        if not all(hourly_chunks):
+            raise ValueError("No data returned from API.")
+        frames.append(pd.concat(
+            [_hourly_to_dataframe(hourly_data) for hourly_data in hourly_chunks],
+            ignore_index=True
+        ))
+    return frames
+
+def _load_archived(path):
+    """Read frames stored by _store_archived, or None if the entry is missing or unreadable."""
+    try:
+        with path.open('rb') as f:
+            frames = pickle.load(f)
+        path.touch()  # mark as recently used so pruning keeps it
+        return frames
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+def _store_archived(path, frames):
+    """Write frames to the archive cache and prune the least recently used files."""
+    try:
+        _ARCHIVE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=_ARCHIVE_CACHE_DIR, suffix='.tmp', delete=False) as f:
+            pickle.dump(frames, f)
+        Path(f.name).replace(path)
+        entries = sorted(_ARCHIVE_CACHE_DIR.glob('*.pkl'), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:-_ARCHIVE_CACHE_MAX_FILES]:
+            entry.unlink(missing_ok=True)
+    except OSError:
+        pass  # the disk cache is best effort, the in-memory cache still holds the result
+
+@st.cache_data(ttl=86400, max_entries=256, show_spinner=False)
+def _fetch_wind_data_cached(latitudes, longitudes, start_date, end_date):
+    """Fetch wind data for canonical coordinate tuples and 'YYYY-MM-DD' date strings."""
+    # Failures are raised, not returned, so neither cache ever stores them.
+    # Recent ranges may still contain hours the archive has not filled in yet, so they only
+    # live in memory for 24 h, settled ranges are also kept on disk.
+    archived = date.fromisoformat(end_date) < date.today() - _ARCHIVE_LAG
+    key = repr((latitudes, longitudes, start_date, end_date)).encode()
+    path = _ARCHIVE_CACHE_DIR / f"{hashlib.sha1(key).hexdigest()}.pkl"
+    if archived:
+        frames = _load_archived(path)
+        if frames is not None:
+            return frames
+    frames = _download_wind_data(latitudes, longitudes, start_date, end_date)
+    if archived:
+        _store_archived(path, frames)
+    return frames
+
+def fetch_wind_data_batch(latitudes, longitudes, start_date, end_date):
+    """Fetch historical wind data for several locations with a single Open-Meteo request."""
+    # Round coordinates and sort the unique locations, so the same set in any order shares one cache entry
+    requested = [(round(latitude, 2), round(longitude, 2)) for latitude, longitude in zip(latitudes, longitudes)]
+    locations = sorted(set(requested))
+    try:
+        with st.spinner("Fetching data..."):
+            frames = _fetch_wind_data_cached(
+                tuple(latitude for latitude, _ in locations),
+                tuple(longitude for _, longitude in locations),
+                start_date.strftime('%Y-%m-%d'),
+                end_date.strftime('%Y-%m-%d')
+            )
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # ValueError also covers orjson.JSONDecodeError
+        st.error(f"Error fetching data from API: {e}")
+        return [pd.DataFrame() for _ in latitudes]
+
+    # Hand the results back in the order the locations were requested, repeated locations get their
+    # own copy because callers add columns to the frames they receive
+    frames_by_location = dict(zip(locations, frames))
+    results = []
+    seen = set()
+    for location in requested:
+        frame = frames_by_location[location]
+        results.append(frame.copy() if location in seen else frame)
+        seen.add(location)
+    return results
+
+def fetch_wind_data(latitude, longitude, start_date, end_date):
+    """Fetch historical wind data using the Open-Meteo API."""
+    return fetch_wind_data_batch((latitude,), (longitude,), start_date, end_date)[0]
+
+def wind_stats(df):
+    """Summarize the wind speed and gust columns, skipping missing hours like pandas does."""
+    speeds = df['wind_speed_10m'].to_numpy()
+    gusts = df['wind_gusts_10m'].to_numpy()
+    return {
+        'wind_max': float(np.nanmax(speeds)),
+        'wind_mean': float(np.nanmean(speeds)),
+        'wind_min': float(np.nanmin(speeds)),
+        'gust_max': float(np.nanmax(gusts)),
+    }
+
+@st.cache_resource
+def _get_geolocator():
+    """Create the Nominatim client shared by all sessions."""
+    return Nominatim(user_agent="wind_profit_analysis", timeout=5)
+
+class _AddressNotFound(Exception):
+    """Raised when Nominatim cannot resolve an address, so the miss is never cached."""
+
+# Coordinates of an address do not change, so found results are persisted to disk and never expire
+@st.cache_data(persist="disk", max_entries=1024, show_spinner=False)
+def _geocode_cached(address_norm):
+    """Geocode a normalized address, raising _AddressNotFound when it is not found."""
+    location = _get_geolocator().geocode(address_norm)
+    if not location:
+        raise _AddressNotFound(address_norm)
+    return location.latitude, location.longitude
+
+def get_lat_lon_from_address(address):
+    """Convert address to latitude and longitude."""
+    try:
+        return _geocode_cached(address.strip().lower())
+    except _AddressNotFound:
+        st.error(f"Could not find location for address: {address}")
+        return None, None
+    except Exception as e:
+        st.error(f"An error occurred while fetching the location: {e}")
+        return None, None
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def to_excel(df, metadata, filename='wind_data.xlsx'):
+    """Convert DataFrame to Excel format with metadata."""
+    # Convert timezone-aware datetimes to naive datetimes on a copy, the caller's data stays untouched
+    df = df.copy(deep=False)
+    if isinstance(df['date'].dtype, pd.DatetimeTZDtype):
+        df['date'] = df['date'].dt.tz_localize(None)
+    
+    output = BytesIO()
+    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+
+    # Write the main data to the first sheet
+    df.to_excel(writer, index=False, sheet_name='Wind Data')
+
+    # Write metadata to a second sheet, keys as the header row and values below
+    worksheet = writer.book.add_worksheet('Metadata')
+    worksheet.write_row(0, 0, list(metadata.keys()))
+    worksheet.write_row(1, 0, list(metadata.values()))
+
+    writer.close()
+    processed_data = output.getvalue()
+
+    return processed_data